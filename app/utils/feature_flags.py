@@ -2,16 +2,34 @@
 
 from __future__ import annotations
 
-import json
+import fcntl
 import os
+import tempfile
+import threading
 import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Any
-from urllib import error, request
+
+import orjson
+import requests
+from requests.exceptions import RequestException
 
 _CATALOG_FILE = Path(__file__).resolve().parents[2] / "config" / "feature-flags.json"
+_CATALOG_RECHECK_INTERVAL_SECONDS = 1.0
 _ENABLED_STATUSES = {"active", "released", "enabled"}
+_BOOL_STRINGS = {
+    "1": True,
+    "true": True,
+    "yes": True,
+    "on": True,
+    "0": False,
+    "false": False,
+    "no": False,
+    "off": False,
+}
 _OVERRIDE_ENV = "AURAXIS_FEATURE_FLAGS"
 _PROVIDER_ENV = "AURAXIS_FLAG_PROVIDER"
 _UNLEASH_URL_ENV = "AURAXIS_UNLEASH_URL"
@@ -21,13 +39,11 @@ _UNLEASH_INSTANCE_ID_ENV = "AURAXIS_UNLEASH_INSTANCE_ID"
 _UNLEASH_ENVIRONMENT_ENV = "AURAXIS_UNLEASH_ENVIRONMENT"
 _UNLEASH_TIMEOUT_ENV = "AURAXIS_UNLEASH_TIMEOUT_SECONDS"
 _UNLEASH_CACHE_TTL_ENV = "AURAXIS_UNLEASH_CACHE_TTL_SECONDS"
+_UNLEASH_SHARED_SNAPSHOT_ENV = "AURAXIS_UNLEASH_SHARED_SNAPSHOT_PATH"
 _UNLEASH_ENDPOINT_PATH = "/api/client/features"
 _UNLEASH_DEFAULT_TIMEOUT_SECONDS = 2.0
 _UNLEASH_DEFAULT_CACHE_TTL_SECONDS = 30.0
 
-_unleash_cache_snapshot: dict[str, bool] = {}
-_unleash_cache_expire_at_seconds = 0.0
-
 
 def _read_env_value(keys: tuple[str, ...], default_value: str = "") -> str:
     """Read env values using precedence order."""
@@ -45,16 +61,11 @@ def _normalize_status(value: object) -> str:
 
 
 def _as_bool_or_none(value: object) -> bool | None:
-    if isinstance(value, bool):
-        return value
     if value is None:
         return None
-    normalized = str(value).strip().lower()
-    if normalized in {"1", "true", "yes", "on"}:
-        return True
-    if normalized in {"0", "false", "no", "off"}:
-        return False
-    return None
+    if isinstance(value, bool):
+        return value
+    return _BOOL_STRINGS.get(str(value).strip().lower())
 
 
 def _get_provider_mode() -> str:
@@ -68,30 +79,31 @@ def _get_unleash_url() -> str:
     ).rstrip("/")
 
 
-def _get_unleash_timeout_seconds() -> float:
-    raw_timeout = str(
-        os.getenv(_UNLEASH_TIMEOUT_ENV, str(_UNLEASH_DEFAULT_TIMEOUT_SECONDS)),
-    ).strip()
+def _read_positive_float_env(key: str, default_value: float) -> float:
+    raw_value = os.environ.get(key)
+    if not raw_value:
+        return default_value
     try:
-        timeout_seconds = float(raw_timeout)
+        parsed_value = float(raw_value)
     except ValueError:
-        return _UNLEASH_DEFAULT_TIMEOUT_SECONDS
-    if timeout_seconds <= 0:
-        return _UNLEASH_DEFAULT_TIMEOUT_SECONDS
-    return timeout_seconds
+        return default_value
+    if parsed_value <= 0:
+        return default_value
+    return parsed_value
+
+
+def _get_unleash_timeout_seconds() -> float:
+    return _read_positive_float_env(
+        _UNLEASH_TIMEOUT_ENV,
+        _UNLEASH_DEFAULT_TIMEOUT_SECONDS,
+    )
 
 
 def _get_unleash_cache_ttl_seconds() -> float:
-    raw_ttl = str(
-        os.getenv(_UNLEASH_CACHE_TTL_ENV, str(_UNLEASH_DEFAULT_CACHE_TTL_SECONDS)),
-    ).strip()
-    try:
-        ttl_seconds = float(raw_ttl)
-    except ValueError:
-        return _UNLEASH_DEFAULT_CACHE_TTL_SECONDS
-    if ttl_seconds <= 0:
-        return _UNLEASH_DEFAULT_CACHE_TTL_SECONDS
-    return ttl_seconds
+    return _read_positive_float_env(
+        _UNLEASH_CACHE_TTL_ENV,
+        _UNLEASH_DEFAULT_CACHE_TTL_SECONDS,
+    )
 
 
 def _build_unleash_headers() -> dict[str, str]:
@@ -119,6 +131,68 @@ def _build_unleash_headers() -> dict[str, str]:
     return headers
 
 
+@dataclass(frozen=True, slots=True)
+class UnleashConfig:
+    """Env-derived Unleash settings, resolved once per refresh cycle."""
+
+    provider_mode: str
+    url: str
+    request_url: str
+    timeout: float
+    ttl: float
+    headers: tuple[tuple[str, str], ...]
+    shared_snapshot_path: Path | None
+
+
+@dataclass(slots=True)
+class _UnleashCacheBox:
+    snapshot: dict[str, bool] = field(default_factory=dict)
+    expire_at: float = 0.0
+    etag: str | None = None
+    refresh_lock: threading.Lock = field(default_factory=threading.Lock)
+    refresh_thread: threading.Thread | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class _CatalogSnapshot:
+    mtime_ns: int | None
+    recheck_at: float
+    enabled_by_key: dict[str, bool]
+
+
+_unleash_cache = _UnleashCacheBox()
+_unleash_session: requests.Session | None = None
+_catalog_cache: _CatalogSnapshot | None = None
+_overrides_cache: dict[str, bool] | None = None
+_provider_decision_cache: dict[str, tuple[float, bool | None]] = {}
+
+
+@lru_cache(maxsize=1)
+def _unleash_config() -> UnleashConfig:
+    unleash_url = _get_unleash_url()
+    shared_snapshot_path = _read_env_value((_UNLEASH_SHARED_SNAPSHOT_ENV,), "")
+    return UnleashConfig(
+        provider_mode=_get_provider_mode(),
+        url=unleash_url,
+        request_url=f"{unleash_url}{_UNLEASH_ENDPOINT_PATH}",
+        timeout=_get_unleash_timeout_seconds(),
+        ttl=_get_unleash_cache_ttl_seconds(),
+        headers=tuple(_build_unleash_headers().items()),
+        shared_snapshot_path=Path(shared_snapshot_path)
+        if shared_snapshot_path
+        else None,
+    )
+
+
+def _get_unleash_session() -> requests.Session:
+    """Return the keep-alive session reused across Unleash refreshes."""
+    global _unleash_session
+
+    if _unleash_session is None:
+        _unleash_session = requests.Session()
+    return _unleash_session
+
+
 def _parse_unleash_payload(payload: object) -> dict[str, bool]:
     if not isinstance(payload, dict):
         return {}
@@ -127,126 +201,342 @@ def _parse_unleash_payload(payload: object) -> dict[str, bool]:
     if not isinstance(features, list):
         return {}
 
-    parsed_flags: dict[str, bool] = {}
-    for feature in features:
-        if not isinstance(feature, dict):
-            continue
+    # Check the cheap ``enabled`` type first so malformed entries never pay
+    # for name normalization.
+    return {
+        flag_name: flag_enabled
+        for feature in features
+        if isinstance(feature, dict)
+        and isinstance(flag_enabled := feature.get("enabled"), bool)
+        and (flag_name := str(feature.get("name", "")).strip())
+    }
 
-        flag_name = str(feature.get("name", "")).strip()
-        flag_enabled = feature.get("enabled")
-        if flag_name and isinstance(flag_enabled, bool):
-            parsed_flags[flag_name] = flag_enabled
 
-    return parsed_flags
+def _read_shared_snapshot(config: UnleashConfig, cache: _UnleashCacheBox) -> bool:
+    """Adopt a sibling worker's snapshot from disk while it is within the TTL."""
+    snapshot_path = config.shared_snapshot_path
+    if snapshot_path is None:
+        return False
 
+    try:
+        snapshot_age = time.time() - os.stat(snapshot_path).st_mtime
+        if not 0 <= snapshot_age < config.ttl:
+            return False
+        payload = orjson.loads(snapshot_path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return False
 
-def _fetch_unleash_snapshot() -> dict[str, bool]:
-    global _unleash_cache_expire_at_seconds
-    global _unleash_cache_snapshot
+    if not isinstance(payload, dict) or not isinstance(payload.get("flags"), dict):
+        return False
 
-    if _get_provider_mode() != "unleash":
-        return {}
+    etag = payload.get("etag")
+    cache.snapshot = {
+        flag_name: flag_enabled
+        for flag_name, flag_enabled in payload["flags"].items()
+        if isinstance(flag_enabled, bool)
+    }
+    cache.expire_at = time.monotonic() + config.ttl - snapshot_age
+    cache.etag = etag if isinstance(etag, str) else None
+    return True
 
-    unleash_url = _get_unleash_url()
-    if not unleash_url:
-        return {}
 
+def _write_shared_snapshot(config: UnleashConfig, cache: _UnleashCacheBox) -> None:
+    """Publish the current snapshot for sibling workers; failures are ignored."""
+    snapshot_path = config.shared_snapshot_path
+    # A box detached by refresh_feature_flag_state() may hold a result fetched
+    # under the old config; never let it overwrite the shared file.
+    if snapshot_path is None or cache is not _unleash_cache:
+        return
+
+    payload = orjson.dumps({"etag": cache.etag, "flags": cache.snapshot})
+    try:
+        fd, tmp_name = tempfile.mkstemp(
+            dir=snapshot_path.parent,
+            prefix=f".{snapshot_path.name}.",
+        )
+    except OSError:
+        return
+
+    # Write to a temp file and rename so readers never observe a partial file.
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_name, snapshot_path)
+    except OSError:
+        with suppress(OSError):
+            os.unlink(tmp_name)
+
+
+@contextmanager
+def _shared_fetch_lock(config: UnleashConfig, *, wait: bool) -> Iterator[bool]:
+    """Hold the cross-worker Unleash fetch lock; yield whether it was acquired."""
+    snapshot_path = config.shared_snapshot_path
+    if snapshot_path is None:
+        yield True
+        return
+
+    lock_path = snapshot_path.with_name(f"{snapshot_path.name}.lock")
+    try:
+        lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError:
+        # Without the lock file workers cannot coordinate; fetch as usual.
+        yield True
+        return
+
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not wait:
+                yield False
+                return
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        except OSError:
+            pass  # flock unsupported here (e.g. some network mounts): go unlocked.
+        yield True
+    finally:
+        os.close(lock_fd)
+
+
+def _refresh_unleash_snapshot(
+    config: UnleashConfig,
+    cache: _UnleashCacheBox,
+) -> dict[str, bool] | None:
+    """Refresh ``cache`` from the shared file or Unleash; ``None`` on failure."""
+    if _read_shared_snapshot(config, cache):
+        return cache.snapshot
+
+    # Only a cold worker, which has nothing to serve, waits for a sibling's
+    # fetch; workers holding a stale snapshot back off instead.
+    with _shared_fetch_lock(config, wait=not cache.expire_at) as acquired:
+        if not acquired:
+            # Keep serving stale and re-read the shared file once the sibling's
+            # fetch (bounded by its own timeout) has had time to publish.
+            cache.expire_at = time.monotonic() + min(config.timeout, config.ttl)
+            return cache.snapshot
+        # A sibling may have published a fresh snapshot while we waited.
+        if _read_shared_snapshot(config, cache):
+            return cache.snapshot
+        return _fetch_unleash_into_cache(config, cache)
+
+
+def _fetch_unleash_into_cache(
+    config: UnleashConfig,
+    cache: _UnleashCacheBox,
+) -> dict[str, bool] | None:
     now_seconds = time.monotonic()
-    if now_seconds < _unleash_cache_expire_at_seconds:
-        return _unleash_cache_snapshot
-
-    request_url = f"{unleash_url}{_UNLEASH_ENDPOINT_PATH}"
-    request_obj = request.Request(
-        request_url,
-        headers=_build_unleash_headers(),
-        method="GET",
-    )
+    headers = dict(config.headers)
+    if cache.etag:
+        headers["If-None-Match"] = cache.etag
 
     try:
-        with request.urlopen(
-            request_obj,
-            timeout=_get_unleash_timeout_seconds(),
-        ) as response:
-            response_status = int(getattr(response, "status", 200))
-            if response_status != 200:
-                return {}
-            payload = json.loads(response.read().decode("utf-8"))
-    except (
-        error.URLError,
-        TimeoutError,
-        UnicodeDecodeError,
-        json.JSONDecodeError,
-    ):
-        return {}
+        response = _get_unleash_session().get(
+            config.request_url,
+            headers=headers,
+            timeout=config.timeout,
+        )
+        if response.status_code == 304 and cache.etag:
+            cache.expire_at = now_seconds + config.ttl
+            _write_shared_snapshot(config, cache)
+            return cache.snapshot
+        if response.status_code != 200:
+            return None
+        payload = orjson.loads(response.content)
+    except (RequestException, orjson.JSONDecodeError):
+        return None
 
     parsed_flags = _parse_unleash_payload(payload)
-    _unleash_cache_snapshot = parsed_flags
-    _unleash_cache_expire_at_seconds = now_seconds + _get_unleash_cache_ttl_seconds()
+    cache.snapshot = parsed_flags
+    cache.expire_at = now_seconds + config.ttl
+    cache.etag = response.headers.get("ETag")
+    _write_shared_snapshot(config, cache)
     return parsed_flags
 
 
+def _run_background_refresh(config: UnleashConfig, cache: _UnleashCacheBox) -> None:
+    try:
+        if _refresh_unleash_snapshot(config, cache) is None:
+            # Keep serving the stale snapshot for another TTL window instead
+            # of spawning a refresh on every call while Unleash is down.
+            cache.expire_at = time.monotonic() + config.ttl
+    finally:
+        cache.refresh_lock.release()
+
+
+def _start_background_refresh(config: UnleashConfig, cache: _UnleashCacheBox) -> None:
+    if not cache.refresh_lock.acquire(blocking=False):
+        return
+
+    try:
+        cache.refresh_thread = threading.Thread(
+            target=_run_background_refresh,
+            args=(config, cache),
+            name="unleash-snapshot-refresh",
+            daemon=True,
+        )
+        cache.refresh_thread.start()
+    except RuntimeError:
+        # The thread never ran, so release the lock ourselves or this box
+        # would serve its stale snapshot forever.
+        cache.refresh_thread = None
+        cache.refresh_lock.release()
+
+
+def _fetch_unleash_snapshot() -> dict[str, bool]:
+    config = _unleash_config()
+    if config.provider_mode != "unleash" or not config.url:
+        return {}
+
+    # Bind the box once: refresh_feature_flag_state() swaps in a new one, so
+    # an in-flight background refresh only ever writes to the detached box.
+    cache = _unleash_cache
+    if time.monotonic() < cache.expire_at:
+        return cache.snapshot
+
+    if cache.expire_at:
+        # Serve the stale snapshot and revalidate off the request path.
+        stale_snapshot = cache.snapshot
+        _start_background_refresh(config, cache)
+        return stale_snapshot
+
+    snapshot = _refresh_unleash_snapshot(config, cache)
+    return snapshot if snapshot is not None else {}
+
+
 def resolve_provider_decision(flag_key: str) -> bool | None:
     """Resolve provider decision for a flag using Unleash-compatible endpoint."""
-    snapshot = _fetch_unleash_snapshot()
-    provider_value = snapshot.get(flag_key)
-    if isinstance(provider_value, bool):
-        return provider_value
-    return None
+    config = _unleash_config()
+    if config.provider_mode != "unleash" or not config.url:
+        return None
 
+    now_seconds = time.monotonic()
+    cached_decision = _provider_decision_cache.get(flag_key)
+    if cached_decision is not None and now_seconds < cached_decision[0]:
+        return cached_decision[1]
 
-@lru_cache(maxsize=1)
-def _load_catalog() -> dict[str, dict[str, Any]]:
-    if not _CATALOG_FILE.exists():
+    cache = _unleash_cache
+    snapshot = _fetch_unleash_snapshot()
+    provider_value = snapshot.get(flag_key)
+    decision = provider_value if isinstance(provider_value, bool) else None
+    # Only memoize while the snapshot we served is still the live one; failed,
+    # disabled or stale-while-revalidating lookups are retried on the next
+    # call. Refreshes write the snapshot before its expiry, so reading the
+    # expiry first and then checking identity never pairs a stale snapshot
+    # with a fresh expiry.
+    expire_at = cache.expire_at
+    if snapshot is cache.snapshot and now_seconds < expire_at:
+        _provider_decision_cache[flag_key] = (expire_at, decision)
+    return decision
+
+
+def _read_catalog() -> dict[str, bool] | None:
+    """Parse the catalog file; ``None`` when it is unreadable or malformed."""
+    try:
+        payload = orjson.loads(_CATALOG_FILE.read_bytes())
+    except FileNotFoundError:
         return {}
+    except (OSError, orjson.JSONDecodeError):
+        return None
 
-    payload = json.loads(_CATALOG_FILE.read_text(encoding="utf-8"))
+    if not isinstance(payload, dict):
+        return None
     flags = payload.get("flags", [])
     if not isinstance(flags, list):
-        return {}
+        return None
 
-    by_key: dict[str, dict[str, Any]] = {}
+    # Only the resolved enabled state is needed at runtime, so keep a flat
+    # key -> bool map instead of the full flag metadata.
+    enabled_by_key: dict[str, bool] = {}
     for flag in flags:
         if not isinstance(flag, dict):
             continue
         key = str(flag.get("key", "")).strip()
         if not key:
             continue
-        by_key[key] = flag
-    return by_key
+        enabled_by_key[key] = _normalize_status(flag.get("status")) in _ENABLED_STATUSES
+    return enabled_by_key
 
 
-@lru_cache(maxsize=1)
-def _load_overrides() -> dict[str, bool]:
-    raw_payload = str(os.getenv(_OVERRIDE_ENV, "")).strip()
+def _load_catalog() -> dict[str, bool]:
+    """Return the local catalog, reloading it when the file's mtime changes."""
+    global _catalog_cache
+
+    now_seconds = time.monotonic()
+    cached = _catalog_cache
+    if cached is not None and now_seconds < cached.recheck_at:
+        return cached.enabled_by_key
+
+    # Stat at most once per recheck interval so catalog edits are picked up
+    # without adding a syscall to every flag resolution.
+    try:
+        mtime_ns: int | None = os.stat(_CATALOG_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+
+    if cached is not None and cached.mtime_ns == mtime_ns:
+        enabled_by_key = cached.enabled_by_key
+    elif mtime_ns is None:
+        enabled_by_key = {}
+    else:
+        parsed_catalog = _read_catalog()
+        if parsed_catalog is None:
+            # Keep the last good catalog while the file is mid-edit or broken;
+            # recording the new mtime below avoids re-parsing it every call.
+            enabled_by_key = cached.enabled_by_key if cached is not None else {}
+        else:
+            enabled_by_key = parsed_catalog
+
+    _catalog_cache = _CatalogSnapshot(
+        mtime_ns=mtime_ns,
+        recheck_at=now_seconds + _CATALOG_RECHECK_INTERVAL_SECONDS,
+        enabled_by_key=enabled_by_key,
+    )
+    return enabled_by_key
+
+
+def _read_overrides() -> dict[str, bool]:
+    raw_payload = os.environ.get(_OVERRIDE_ENV, "").strip()
     if not raw_payload:
         return {}
 
     try:
-        parsed = json.loads(raw_payload)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(raw_payload)
+    except orjson.JSONDecodeError:
         return {}
 
     if not isinstance(parsed, dict):
         return {}
 
-    overrides: dict[str, bool] = {}
-    for key, value in parsed.items():
-        bool_value = _as_bool_or_none(value)
-        if bool_value is None:
-            continue
-        overrides[str(key)] = bool_value
-    return overrides
+    return {
+        key: bool_value
+        for key, value in parsed.items()
+        if (bool_value := _as_bool_or_none(value)) is not None
+    }
+
+
+def _load_overrides() -> dict[str, bool]:
+    global _overrides_cache
+
+    if _overrides_cache is None:
+        _overrides_cache = _read_overrides()
+    return _overrides_cache
 
 
 def refresh_feature_flag_state() -> None:
     """Clear in-memory caches for provider, catalog and env overrides."""
-    global _unleash_cache_expire_at_seconds
-    global _unleash_cache_snapshot
+    global _catalog_cache
+    global _overrides_cache
+    global _unleash_cache
+    global _unleash_session
 
-    _load_catalog.cache_clear()
-    _load_overrides.cache_clear()
-    _unleash_cache_snapshot = {}
-    _unleash_cache_expire_at_seconds = 0.0
+    _catalog_cache = None
+    _overrides_cache = None
+    _unleash_config.cache_clear()
+    _unleash_cache = _UnleashCacheBox()
+    _provider_decision_cache.clear()
+    if _unleash_session is not None:
+        _unleash_session.close()
+        _unleash_session = None
 
 
 def is_feature_enabled(
@@ -266,7 +556,22 @@ def is_feature_enabled(
     if flag_key in overrides:
         return overrides[flag_key]
 
+    return _load_catalog().get(flag_key, False)
+
+
+def are_features_enabled(flag_keys: Iterable[str]) -> dict[str, bool]:
+    """Resolve several flags against a single provider/override/catalog read."""
+    snapshot = _fetch_unleash_snapshot()
+    overrides = _load_overrides()
     catalog = _load_catalog()
-    local_flag = catalog.get(flag_key, {})
-    status = _normalize_status(local_flag.get("status"))
-    return status in _ENABLED_STATUSES
+
+    resolved: dict[str, bool] = {}
+    for flag_key in flag_keys:
+        provider_value = snapshot.get(flag_key)
+        if provider_value is not None:
+            resolved[flag_key] = provider_value
+        elif flag_key in overrides:
+            resolved[flag_key] = overrides[flag_key]
+        else:
+            resolved[flag_key] = catalog.get(flag_key, False)
+    return resolved
@@ -10,15 +10,17 @@ from datetime import date
 from pathlib import Path
 from typing import Any
 
-ALLOWED_TYPES = {"release", "experiment", "kill-switch"}
-ALLOWED_STATUS = {
-    "draft",
-    "enabled-dev",
-    "enabled-staging",
-    "enabled-prod",
-    "cleanup-pending",
-    "removed",
-}
+ALLOWED_TYPES = frozenset({"release", "experiment", "kill-switch"})
+ALLOWED_STATUS = frozenset(
+    {
+        "draft",
+        "enabled-dev",
+        "enabled-staging",
+        "enabled-prod",
+        "cleanup-pending",
+        "removed",
+    }
+)
 
 
 @dataclass
@@ -55,10 +57,10 @@ def get_flag_key(flag: dict[str, Any], errors: list[ValidationError]) -> str | N
 
 
 def validate_key(
-    key: str, prefix: str, seen_keys: set[str], errors: list[ValidationError]
+    key: str, prefix_dot: str, seen_keys: set[str], errors: list[ValidationError]
 ) -> None:
-    if not key.startswith(f"{prefix}."):
-        errors.append(ValidationError(f"{key}: key must start with '{prefix}.'"))
+    if not key.startswith(prefix_dot):
+        errors.append(ValidationError(f"{key}: key must start with '{prefix_dot}'"))
 
     if key in seen_keys:
         errors.append(ValidationError(f"{key}: duplicate key detected"))
@@ -109,7 +111,7 @@ def validate_dates(
 
 def validate_flag(
     flag: Any,
-    prefix: str,
+    prefix_dot: str,
     today: date,
     seen_keys: set[str],
     errors: list[ValidationError],
@@ -124,7 +126,7 @@ def validate_flag(
     if not key:
         return
 
-    validate_key(key, prefix, seen_keys, errors)
+    validate_key(key, prefix_dot, seen_keys, errors)
     status = validate_owner_type_status(key, flag, errors)
     validate_dates(key, flag, status, today, errors)
 
@@ -133,9 +135,10 @@ def validate_flags(flags: list[dict[str, Any]], prefix: str) -> list[ValidationE
     errors: list[ValidationError] = []
     seen_keys: set[str] = set()
     today = date.today()
+    prefix_dot = f"{prefix}."
 
     for flag in flags:
-        validate_flag(flag, prefix, today, seen_keys, errors)
+        validate_flag(flag, prefix_dot, today, seen_keys, errors)
 
     return errors
 
@@ -1,10 +1,62 @@
 from __future__ import annotations
 
+import importlib.util
 import json
+import os
+import sys
+import threading
+import time
+from typing import Iterator
+
+import pytest
+from requests.exceptions import ConnectionError
 
 from app.utils import feature_flags
 
 
+@pytest.fixture(autouse=True)
+def reset_feature_flag_state() -> Iterator[None]:
+    yield
+    feature_flags.refresh_feature_flag_state()
+
+
+class FakeUnleashResponse:
+    def __init__(
+        self,
+        content: bytes,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeUnleashSession:
+    def __init__(self, *responses: FakeUnleashResponse | Exception) -> None:
+        self.responses = list(responses)
+        self.calls: list[dict[str, str]] = []
+
+    def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        timeout: float = 0,
+    ) -> FakeUnleashResponse:
+        self.calls.append(dict(headers or {}))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _use_fake_unleash(monkeypatch, session: FakeUnleashSession) -> None:
+    monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "unleash")
+    monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://flags.local")
+    monkeypatch.setattr(feature_flags, "_get_unleash_session", lambda: session)
+    feature_flags.refresh_feature_flag_state()
+
+
 def test_feature_flag_uses_local_catalog_status() -> None:
     feature_flags.refresh_feature_flag_state()
     assert (
@@ -41,34 +93,18 @@ def test_feature_flag_ignores_invalid_override_payload(monkeypatch) -> None:
 
 
 def test_feature_flag_uses_unleash_provider_snapshot(monkeypatch) -> None:
-    class FakeUnleashResponse:
-        status = 200
-
-        def __enter__(self) -> "FakeUnleashResponse":
-            return self
-
-        def __exit__(self, exc_type, exc, tb) -> bool:
-            return False
-
-        def read(self) -> bytes:
-            payload = {
-                "features": [
-                    {
-                        "name": "api.tools.salary-raise-calculator",
-                        "enabled": True,
-                    },
-                ],
-            }
-            return json.dumps(payload).encode("utf-8")
-
-    monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "unleash")
-    monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://flags.local")
-    monkeypatch.setattr(
-        feature_flags.request,
-        "urlopen",
-        lambda _req, timeout=0: FakeUnleashResponse(),
+    payload = {
+        "features": [
+            {
+                "name": "api.tools.salary-raise-calculator",
+                "enabled": True,
+            },
+        ],
+    }
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(FakeUnleashResponse(json.dumps(payload).encode("utf-8"))),
     )
-    feature_flags.refresh_feature_flag_state()
 
     assert (
         feature_flags.resolve_provider_decision(
@@ -79,18 +115,24 @@ def test_feature_flag_uses_unleash_provider_snapshot(monkeypatch) -> None:
     assert feature_flags.is_feature_enabled("api.tools.salary-raise-calculator") is True
 
 
-def test_feature_flag_ignores_unleash_provider_failure(monkeypatch) -> None:
+def test_feature_flag_reuses_unleash_session_across_refreshes(monkeypatch) -> None:
     monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "unleash")
     monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://flags.local")
-    monkeypatch.setattr(
-        feature_flags.request,
-        "urlopen",
-        lambda _req, timeout=0: (_ for _ in ()).throw(
-            feature_flags.error.URLError("network-error"),
-        ),
-    )
     feature_flags.refresh_feature_flag_state()
 
+    session = feature_flags._get_unleash_session()
+    assert feature_flags._get_unleash_session() is session
+
+    feature_flags.refresh_feature_flag_state()
+    assert feature_flags._get_unleash_session() is not session
+
+
+def test_feature_flag_ignores_unleash_provider_failure(monkeypatch) -> None:
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(ConnectionError("network-error")),
+    )
+
     assert (
         feature_flags.is_feature_enabled("api.tools.salary-raise-calculator") is False
     )
@@ -104,3 +146,453 @@ def test_feature_flag_uses_runtime_env_as_unleash_environment_header(
 
     headers = feature_flags._build_unleash_headers()
     assert headers["UNLEASH-ENVIRONMENT"] == "staging"
+
+
+def test_unleash_config_is_memoized_until_refresh(monkeypatch) -> None:
+    monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "unleash")
+    monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://flags.local/")
+    feature_flags.refresh_feature_flag_state()
+
+    config = feature_flags._unleash_config()
+    assert config.provider_mode == "unleash"
+    assert config.url == "https://flags.local"
+
+    monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://other-flags.local")
+    assert feature_flags._unleash_config() is config
+
+    feature_flags.refresh_feature_flag_state()
+    assert feature_flags._unleash_config().url == "https://other-flags.local"
+
+
+def test_unleash_config_prebuilds_request_url_and_headers(monkeypatch) -> None:
+    monkeypatch.setenv("AURAXIS_UNLEASH_API_TOKEN", "client-token")
+    session = FakeUnleashSession(FakeUnleashResponse(b'{"features": []}'))
+    _use_fake_unleash(monkeypatch, session)
+
+    config = feature_flags._unleash_config()
+    assert config.request_url == "https://flags.local/api/client/features"
+    assert dict(config.headers) == feature_flags._build_unleash_headers()
+
+    feature_flags._fetch_unleash_snapshot()
+    assert session.calls[0]["Authorization"] == "client-token"
+
+
+def test_feature_flag_ignores_malformed_unleash_payload(monkeypatch) -> None:
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(FakeUnleashResponse(b"{not-json")),
+    )
+
+    assert (
+        feature_flags.resolve_provider_decision("api.tools.salary-raise-calculator")
+        is None
+    )
+
+
+def test_feature_flag_catalog_precomputes_enabled_state(monkeypatch, tmp_path) -> None:
+    catalog_file = tmp_path / "feature-flags.json"
+    catalog_file.write_text(
+        json.dumps(
+            {
+                "flags": [
+                    {"key": "api.sample.on", "status": " Released "},
+                    {"key": "api.sample.off", "status": "draft"},
+                ],
+            },
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(feature_flags, "_CATALOG_FILE", catalog_file)
+    feature_flags.refresh_feature_flag_state()
+
+    assert feature_flags._load_catalog() == {
+        "api.sample.on": True,
+        "api.sample.off": False,
+    }
+    assert feature_flags.is_feature_enabled("api.sample.on") is True
+    assert feature_flags.is_feature_enabled("api.sample.missing") is False
+
+
+def test_feature_flag_caches_missing_provider_decision(monkeypatch) -> None:
+    payload = {"features": [{"name": "api.other.flag", "enabled": True}]}
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(FakeUnleashResponse(json.dumps(payload).encode("utf-8"))),
+    )
+
+    assert feature_flags.resolve_provider_decision("api.sample.missing") is None
+    assert "api.sample.missing" in feature_flags._provider_decision_cache
+    assert feature_flags.resolve_provider_decision("api.sample.missing") is None
+
+    feature_flags.refresh_feature_flag_state()
+    assert feature_flags._provider_decision_cache == {}
+
+
+def test_parse_unleash_payload_skips_malformed_features() -> None:
+    payload = {
+        "features": [
+            {"name": " api.sample.on ", "enabled": True},
+            {"name": "api.sample.off", "enabled": False},
+            {"name": "api.sample.bad-enabled", "enabled": "true"},
+            {"name": "   ", "enabled": True},
+            "not-a-feature",
+        ],
+    }
+
+    assert feature_flags._parse_unleash_payload(payload) == {
+        "api.sample.on": True,
+        "api.sample.off": False,
+    }
+    assert feature_flags._parse_unleash_payload({"features": {}}) == {}
+    assert feature_flags._parse_unleash_payload([]) == {}
+
+
+def test_feature_flag_reuses_snapshot_on_unleash_not_modified(monkeypatch) -> None:
+    payload = {
+        "features": [{"name": "api.tools.salary-raise-calculator", "enabled": True}],
+    }
+    session = FakeUnleashSession(
+        FakeUnleashResponse(
+            json.dumps(payload).encode("utf-8"),
+            headers={"ETag": '"v1"'},
+        ),
+        FakeUnleashResponse(b"", status_code=304),
+    )
+    _use_fake_unleash(monkeypatch, session)
+
+    first_snapshot = feature_flags._fetch_unleash_snapshot()
+    assert "If-None-Match" not in session.calls[0]
+
+    feature_flags._unleash_cache.expire_at = 0.0
+    assert feature_flags._fetch_unleash_snapshot() is first_snapshot
+    assert session.calls[1]["If-None-Match"] == '"v1"'
+    assert feature_flags._unleash_cache.expire_at > 0.0
+
+
+def test_are_features_enabled_resolves_batch_with_single_fetch(monkeypatch) -> None:
+    payload = {"features": [{"name": "api.sample.provider", "enabled": False}]}
+    monkeypatch.setenv(
+        "AURAXIS_FEATURE_FLAGS",
+        json.dumps({"api.sample.provider": True, "api.sample.override": True}),
+    )
+    session = FakeUnleashSession(
+        FakeUnleashResponse(json.dumps(payload).encode("utf-8")),
+    )
+    _use_fake_unleash(monkeypatch, session)
+
+    assert feature_flags.are_features_enabled(
+        [
+            "api.sample.provider",
+            "api.sample.override",
+            "api.tools.salary-raise-calculator",
+        ],
+    ) == {
+        "api.sample.provider": False,
+        "api.sample.override": True,
+        "api.tools.salary-raise-calculator": False,
+    }
+    assert len(session.calls) == 1
+
+
+def test_as_bool_or_none_normalizes_known_values() -> None:
+    assert feature_flags._as_bool_or_none(None) is None
+    assert feature_flags._as_bool_or_none(True) is True
+    assert feature_flags._as_bool_or_none(False) is False
+    assert feature_flags._as_bool_or_none(" Yes ") is True
+    assert feature_flags._as_bool_or_none(0) is False
+    assert feature_flags._as_bool_or_none("maybe") is None
+
+
+def test_feature_flag_serves_stale_snapshot_while_refreshing(monkeypatch) -> None:
+    stale_payload = {"features": [{"name": "api.sample.flag", "enabled": False}]}
+    fresh_payload = {"features": [{"name": "api.sample.flag", "enabled": True}]}
+    session = FakeUnleashSession(
+        FakeUnleashResponse(json.dumps(stale_payload).encode("utf-8")),
+        FakeUnleashResponse(json.dumps(fresh_payload).encode("utf-8")),
+    )
+    _use_fake_unleash(monkeypatch, session)
+
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": False}
+
+    cache = feature_flags._unleash_cache
+    cache.expire_at = 1.0
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": False}
+
+    assert cache.refresh_thread is not None
+    cache.refresh_thread.join(timeout=5)
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": True}
+    assert len(session.calls) == 2
+
+
+def test_feature_flag_releases_refresh_lock_when_thread_fails(monkeypatch) -> None:
+    class FailingThread:
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        def start(self) -> None:
+            raise RuntimeError("can't start new thread")
+
+    payload = {"features": [{"name": "api.sample.flag", "enabled": False}]}
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(FakeUnleashResponse(json.dumps(payload).encode("utf-8"))),
+    )
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": False}
+
+    monkeypatch.setattr(feature_flags.threading, "Thread", FailingThread)
+    cache = feature_flags._unleash_cache
+    cache.expire_at = 1.0
+
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": False}
+    assert cache.refresh_lock.locked() is False
+    assert cache.refresh_thread is None
+
+
+def test_feature_flag_does_not_memoize_decision_from_stale_snapshot(
+    monkeypatch,
+) -> None:
+    stale_payload = {"features": [{"name": "api.sample.flag", "enabled": False}]}
+    fresh_payload = {"features": [{"name": "api.sample.flag", "enabled": True}]}
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(
+            FakeUnleashResponse(json.dumps(stale_payload).encode("utf-8")),
+            FakeUnleashResponse(json.dumps(fresh_payload).encode("utf-8")),
+        ),
+    )
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": False}
+
+    # Let the "background" refresh finish before the stale value is returned.
+    monkeypatch.setattr(
+        feature_flags,
+        "_start_background_refresh",
+        feature_flags._refresh_unleash_snapshot,
+    )
+    feature_flags._unleash_cache.expire_at = 1.0
+
+    assert feature_flags.resolve_provider_decision("api.sample.flag") is False
+    assert "api.sample.flag" not in feature_flags._provider_decision_cache
+    assert feature_flags.resolve_provider_decision("api.sample.flag") is True
+
+
+def test_feature_flag_drops_refresh_for_detached_cache(monkeypatch, tmp_path) -> None:
+    shared_path = tmp_path / "auraxis-flags.json"
+    monkeypatch.setenv("AURAXIS_UNLEASH_SHARED_SNAPSHOT_PATH", str(shared_path))
+    payload = {"features": [{"name": "api.sample.flag", "enabled": True}]}
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(FakeUnleashResponse(json.dumps(payload).encode("utf-8"))),
+    )
+    detached_cache = feature_flags._unleash_cache
+    feature_flags.refresh_feature_flag_state()
+
+    feature_flags._refresh_unleash_snapshot(
+        feature_flags._unleash_config(),
+        detached_cache,
+    )
+
+    assert detached_cache.snapshot == {"api.sample.flag": True}
+    assert feature_flags._unleash_cache.snapshot == {}
+    assert not shared_path.exists()
+
+
+def test_unleash_timing_env_falls_back_to_defaults(monkeypatch) -> None:
+    monkeypatch.delenv("AURAXIS_UNLEASH_TIMEOUT_SECONDS", raising=False)
+    monkeypatch.setenv("AURAXIS_UNLEASH_CACHE_TTL_SECONDS", "not-a-number")
+    assert feature_flags._get_unleash_timeout_seconds() == 2.0
+    assert feature_flags._get_unleash_cache_ttl_seconds() == 30.0
+
+    monkeypatch.setenv("AURAXIS_UNLEASH_TIMEOUT_SECONDS", " 0.5 ")
+    monkeypatch.setenv("AURAXIS_UNLEASH_CACHE_TTL_SECONDS", "-1")
+    assert feature_flags._get_unleash_timeout_seconds() == 0.5
+    assert feature_flags._get_unleash_cache_ttl_seconds() == 30.0
+
+
+def test_feature_flag_catalog_reloads_when_file_changes(monkeypatch, tmp_path) -> None:
+    catalog_file = tmp_path / "feature-flags.json"
+    catalog_file.write_text(
+        json.dumps({"flags": [{"key": "api.sample.flag", "status": "draft"}]}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(feature_flags, "_CATALOG_FILE", catalog_file)
+    monkeypatch.setattr(feature_flags, "_CATALOG_RECHECK_INTERVAL_SECONDS", 0.0)
+    feature_flags.refresh_feature_flag_state()
+    assert feature_flags.is_feature_enabled("api.sample.flag") is False
+
+    catalog_file.write_text(
+        json.dumps({"flags": [{"key": "api.sample.flag", "status": "released"}]}),
+        encoding="utf-8",
+    )
+    stat = catalog_file.stat()
+    os.utime(catalog_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert feature_flags.is_feature_enabled("api.sample.flag") is True
+
+    catalog_file.unlink()
+    assert feature_flags._load_catalog() == {}
+
+
+def test_feature_flag_override_payload_coerces_values(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "AURAXIS_FEATURE_FLAGS",
+        json.dumps({"api.sample.on": "yes", "api.sample.off": 0, "api.sample.bad": []}),
+    )
+    feature_flags.refresh_feature_flag_state()
+
+    assert feature_flags._load_overrides() == {
+        "api.sample.on": True,
+        "api.sample.off": False,
+    }
+
+
+def test_feature_flag_shares_unleash_snapshot_across_workers(
+    monkeypatch,
+    tmp_path,
+) -> None:
+    shared_path = tmp_path / "auraxis-flags.json"
+    monkeypatch.setenv("AURAXIS_UNLEASH_SHARED_SNAPSHOT_PATH", str(shared_path))
+    payload = {"features": [{"name": "api.sample.flag", "enabled": True}]}
+    _use_fake_unleash(
+        monkeypatch,
+        FakeUnleashSession(
+            FakeUnleashResponse(
+                json.dumps(payload).encode("utf-8"),
+                headers={"ETag": '"v1"'},
+            ),
+        ),
+    )
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": True}
+    assert shared_path.exists()
+
+    # A sibling worker starts cold and must adopt the file without HTTP.
+    sibling_session = FakeUnleashSession()
+    _use_fake_unleash(monkeypatch, sibling_session)
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": True}
+    assert feature_flags._unleash_cache.etag == '"v1"'
+    assert sibling_session.calls == []
+
+
+def test_feature_flag_ignores_expired_shared_snapshot(monkeypatch, tmp_path) -> None:
+    shared_path = tmp_path / "auraxis-flags.json"
+    shared_path.write_bytes(b'{"etag": null, "flags": {"api.sample.flag": false}}')
+    os.utime(shared_path, (1.0, 1.0))
+    monkeypatch.setenv("AURAXIS_UNLEASH_SHARED_SNAPSHOT_PATH", str(shared_path))
+    payload = {"features": [{"name": "api.sample.flag", "enabled": True}]}
+    session = FakeUnleashSession(
+        FakeUnleashResponse(json.dumps(payload).encode("utf-8")),
+    )
+    _use_fake_unleash(monkeypatch, session)
+
+    assert feature_flags._fetch_unleash_snapshot() == {"api.sample.flag": True}
+    assert len(session.calls) == 1
+
+
+def test_feature_flag_catalog_keeps_last_good_state_on_corrupt_rewrite(
+    monkeypatch,
+    tmp_path,
+) -> None:
+    catalog_file = tmp_path / "feature-flags.json"
+    catalog_file.write_text(
+        json.dumps({"flags": [{"key": "api.sample.flag", "status": "released"}]}),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(feature_flags, "_CATALOG_FILE", catalog_file)
+    monkeypatch.setattr(feature_flags, "_CATALOG_RECHECK_INTERVAL_SECONDS", 0.0)
+    feature_flags.refresh_feature_flag_state()
+    assert feature_flags.is_feature_enabled("api.sample.flag") is True
+
+    read_calls: list[None] = []
+    original_read_catalog = feature_flags._read_catalog
+
+    def counting_read_catalog() -> dict[str, bool] | None:
+        read_calls.append(None)
+        return original_read_catalog()
+
+    monkeypatch.setattr(feature_flags, "_read_catalog", counting_read_catalog)
+    for index, corrupt_payload in enumerate(
+        (b'{"flags":[{"key":"api.sample.flag",', b"[]"),
+        start=1,
+    ):
+        catalog_file.write_bytes(corrupt_payload)
+        stat = catalog_file.stat()
+        os.utime(
+            catalog_file,
+            ns=(stat.st_atime_ns, stat.st_mtime_ns + index * 1_000_000_000),
+        )
+
+        assert feature_flags.is_feature_enabled("api.sample.flag") is True
+        assert feature_flags.is_feature_enabled("api.sample.flag") is True
+        assert len(read_calls) == index
+
+
+def test_feature_flag_skips_decision_cache_without_provider(monkeypatch) -> None:
+    monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "local")
+    feature_flags.refresh_feature_flag_state()
+    monkeypatch.setattr(
+        feature_flags,
+        "_fetch_unleash_snapshot",
+        lambda: (_ for _ in ()).throw(AssertionError("provider must not be hit")),
+    )
+
+    assert feature_flags.resolve_provider_decision("api.sample.flag") is None
+    assert feature_flags._provider_decision_cache == {}
+
+
+def test_feature_flag_shared_snapshot_limits_fetches_across_workers(
+    monkeypatch,
+    tmp_path,
+) -> None:
+    ttl_seconds = 0.3
+    run_seconds = 1.2
+    monkeypatch.setenv("AURAXIS_FLAG_PROVIDER", "unleash")
+    monkeypatch.setenv("AURAXIS_UNLEASH_URL", "https://flags.local")
+    monkeypatch.setenv("AURAXIS_UNLEASH_CACHE_TTL_SECONDS", str(ttl_seconds))
+    monkeypatch.setenv(
+        "AURAXIS_UNLEASH_SHARED_SNAPSHOT_PATH",
+        str(tmp_path / "auraxis-flags.json"),
+    )
+    fetch_calls: list[float] = []
+    body = json.dumps(
+        {"features": [{"name": "api.sample.flag", "enabled": True}]},
+    ).encode("utf-8")
+
+    class SlowUnleashSession:
+        def get(self, url, headers=None, timeout=0) -> FakeUnleashResponse:
+            fetch_calls.append(time.monotonic())
+            time.sleep(0.05)
+            return FakeUnleashResponse(body)
+
+    # Each "worker" is an independent copy of the module, like a forked process.
+    workers = []
+    for index in range(4):
+        spec = importlib.util.spec_from_file_location(
+            f"_feature_flags_worker_{index}",
+            feature_flags.__file__,
+        )
+        assert spec is not None and spec.loader is not None
+        worker = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, spec.name, worker)
+        spec.loader.exec_module(worker)
+        session = SlowUnleashSession()
+        worker._get_unleash_session = lambda session=session: session
+        workers.append(worker)
+
+    deadline = time.monotonic() + run_seconds
+
+    def serve(worker) -> None:
+        while time.monotonic() < deadline:
+            assert worker._fetch_unleash_snapshot() == {"api.sample.flag": True}
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=serve, args=(w,)) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for worker in workers:
+        if worker._unleash_cache.refresh_thread is not None:
+            worker._unleash_cache.refresh_thread.join(timeout=5)
+
+    ttl_windows = run_seconds / ttl_seconds
+    assert len(fetch_calls) >= 2
+    # Unshared, every worker would fetch once per window (~4 x 4 = 16).
+    assert len(fetch_calls) <= ttl_windows + 2